@@ -13,6 +13,18 @@ Write your numeric answer (an integer between 0 and 20001) in the space provided
 
 
 import bisect
+import multiprocessing
+import os
+import tempfile
+import time
+from array import array
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is only needed for the vectorized option
+    np = None
 
 # note:
 # can't add the same number to get a target value ie: x+x=t can't be included in the count
@@ -78,10 +90,324 @@ def twoSumRangeSlow(fileName, targetRange):
                 break
     return count
 
+def readNumbers(fileName):
+    numbers = []
+    with open(fileName, "r") as f:
+        for line in f:
+            numbers.append(int(line.rstrip('\n')))
+    return numbers
+
+# option 3: using buckets
+def twoSumRangeBucketed(fileName, targetRange):
+    return countTargetsBucketed(readNumbers(fileName), -targetRange, targetRange)
+
+def countTargetsBucketed(numbers, lo, hi):
+    # number of targets t in [lo, hi] such that x+y=t for distinct numbers x, y
+    # the numbers are hashed into buckets of width hi-lo+1, the size of the target interval
+    # the complements of val, lo-val..hi-val, also span hi-lo+1 values so they can only be in two neighbouring buckets
+    # and each number only checks those, without bisecting or walking over every value in the window
+    # the targets that were hit are marked in a bytearray bitmap over the interval, so there's no set of seen sums
+    width = hi - lo + 1
+    if width <= 0:
+        return 0
+
+    # only distinct values matter, duplicates can't make a new target and x+x doesn't count
+    distinct = set(numbers)
+    buckets = {}
+    for val in distinct:
+        buckets.setdefault(val // width, []).append(val)
+
+    hit = bytearray(width)
+    count = 0
+    for val in distinct:
+        minVal = lo - val
+        maxVal = hi - val
+        for bucket in range(minVal // width, maxVal // width + 1):
+            for other in buckets.get(bucket, ()):
+                # each pair is seen from both sides, only count it from the smaller number
+                # this also skips val + val, the distinctness rule
+                if other > val and minVal <= other <= maxVal:
+                    target = val + other - lo
+                    if not hit[target]:
+                        hit[target] = 1
+                        count += 1
+        if count == width:
+            # every target is already hit
+            break
+    return count
+
+# option 4: vectorized with numpy
+def requireNumpy(feature):
+    if np is None:
+        raise ImportError("%s requires numpy" % feature)
+
+def twoSumRangeNumpy(fileName, targetRange, maxPairs=1 << 22):
+    requireNumpy("twoSumRangeNumpy")
+    with open(fileName, "r") as f:
+        numbers = np.fromfile(f, dtype=np.int64, sep="\n")
+    return countTargetsNumpy(numbers, -targetRange, targetRange, maxPairs)
+
+def countTargetsNumpy(numbers, lo, hi, maxPairs=1 << 22):
+    # same count as twoSumRange, but every step is a numpy operation on whole arrays
+    # np.unique deduplicates and sorts, then np.searchsorted finds every number's window of complements at once
+    # the (number, complement) pairs are enumerated maxPairs at a time, so memory stays bounded however many pairs there are,
+    # and their sums are marked in a boolean array with one entry per target
+    requireNumpy("countTargetsNumpy")
+    if hi < lo:
+        return 0
+    values = np.unique(np.asarray(numbers, dtype=np.int64))
+    return int(np.count_nonzero(targetHits(values, lo, hi, maxPairs)))
+
+def targetHits(values, lo, hi, maxPairs=1 << 22):
+    # boolean array over lo..hi, True where the target is the sum of two of values
+    # values must already be sorted and deduplicated
+    n = len(values)
+
+    # window of complements of values[i] is values[first[i]:last[i]]
+    # starting it after i only counts every pair once and skips x+x
+    first = np.searchsorted(values, lo - values, side="left")
+    first = np.maximum(first, np.arange(1, n + 1))
+    last = np.searchsorted(values, hi - values, side="right")
+    counts = np.maximum(last - first, 0)
+
+    # ends[i] is the number of pairs of values[0..i], pair k belongs to the number i with ends[i-1] <= k < ends[i]
+    ends = np.cumsum(counts)
+    totalPairs = int(ends[-1]) if n else 0
+    hit = np.zeros(hi - lo + 1, dtype=bool)
+
+    for start in range(0, totalPairs, maxPairs):
+        pairs = np.arange(start, min(start + maxPairs, totalPairs), dtype=np.int64)
+        owner = np.searchsorted(ends, pairs, side="right")
+        complement = first[owner] + (pairs - (ends[owner] - counts[owner]))
+        hit[values[owner] + values[complement] - lo] = True
+
+    return hit
+
+class TwoSumIndex:
+    # build once, query many times version of twoSumRange for analysts asking different target intervals of one dataset
+    # the sorted, deduplicated numbers are written once to a binary int64 file and memory mapped on every open,
+    # so a query doesn't re-parse or re-sort the input file
+    # every interval that was already answered is cached with the targets it hit, and a new query only computes
+    # the parts of its interval that no earlier query covered
+    def __init__(self, indexFileName):
+        requireNumpy("TwoSumIndex")
+        if os.path.getsize(indexFileName):
+            self.values = np.memmap(indexFileName, dtype="<i8", mode="r")
+        else:
+            self.values = np.zeros(0, dtype=np.int64)
+        # sorted, non overlapping [lo, hi] intervals that are known, with the sorted array of the targets they hit
+        self.known = []
+
+    @classmethod
+    def build(cls, fileName, indexFileName):
+        requireNumpy("TwoSumIndex")
+        with open(fileName, "r") as f:
+            numbers = np.fromfile(f, dtype=np.int64, sep="\n")
+        np.unique(numbers).astype("<i8").tofile(indexFileName)
+        return cls(indexFileName)
+
+    def countTargets(self, lo, hi):
+        # number of targets t in [lo, hi] such that x+y=t for distinct numbers x, y of the dataset
+        if hi < lo:
+            return 0
+        for gapLo, gapHi in self._gaps(lo, hi):
+            hits = np.flatnonzero(targetHits(self.values, gapLo, gapHi)) + gapLo
+            self._remember(gapLo, gapHi, hits)
+
+        count = 0
+        for knownLo, knownHi, hits in self.known:
+            if knownHi >= lo and knownLo <= hi:
+                count += int(np.searchsorted(hits, hi, side="right") - np.searchsorted(hits, lo, side="left"))
+        return count
+
+    def _gaps(self, lo, hi):
+        # the parts of [lo, hi] that no cached interval covers
+        gaps = []
+        position = lo
+        for knownLo, knownHi, _ in self.known:
+            if knownHi < position:
+                continue
+            if knownLo > hi:
+                break
+            if knownLo > position:
+                gaps.append((position, knownLo - 1))
+            position = knownHi + 1
+        if position <= hi:
+            gaps.append((position, hi))
+        return gaps
+
+    def _remember(self, lo, hi, hits):
+        # insert the new interval and merge it with the intervals right next to it, so the cache stays short
+        self.known.append((lo, hi, hits))
+        self.known.sort(key=lambda interval: interval[0])
+        merged = [self.known[0]]
+        for knownLo, knownHi, knownHits in self.known[1:]:
+            lastLo, lastHi, lastHits = merged[-1]
+            if knownLo == lastHi + 1:
+                merged[-1] = (lastLo, knownHi, np.concatenate((lastHits, knownHits)))
+            else:
+                merged.append((knownLo, knownHi, knownHits))
+        self.known = merged
+
+# option 5: shared memory across processes
+def twoSumRangeParallel(fileName, targetRange, workers=None, tasksPerWorker=4):
+    return countTargetsParallel(readNumbers(fileName), -targetRange, targetRange, workers, tasksPerWorker)
+
+def countTargetsParallel(numbers, lo, hi, workers=None, tasksPerWorker=4):
+    # twoSumRange spread over worker processes
+    # the sorted, deduplicated numbers are written once to multiprocessing.shared_memory and every worker attaches to it by name,
+    # so the array isn't pickled to each process
+    # the outer indices are split into ranges, a worker marks the targets of its range in its own bitmap and the parent ORs them
+    if hi < lo:
+        return 0
+    values = sorted(set(numbers))
+    n = len(values)
+    if n < 2:
+        return 0
+    workers = workers or multiprocessing.cpu_count()
+    taskCount = min(n, workers * tasksPerWorker)
+    step = -(-n // taskCount)
+
+    shm = shared_memory.SharedMemory(create=True, size=8 * n)
+    try:
+        # the segment can be rounded up to a whole page, only the first n numbers are ours
+        view = shm.buf.cast("q")
+        view[:n] = array("q", values)
+        view.release()
+
+        tasks = [(shm.name, n, start, min(start + step, n), lo, hi) for start in range(0, n, step)]
+        with multiprocessing.Pool(workers) as pool:
+            bitmaps = pool.map(_sweep2Sum, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return sum(orBitmaps(bitmaps))
+
+def _sweep2Sum(task):
+    # worker: same bisect loop as twoSumRange over values[start:stop], reading the shared array
+    name, n, start, stop, lo, hi = task
+    shm = shared_memory.SharedMemory(name=name)
+    view = shm.buf.cast("q")
+    # only the first n numbers, any padding after them would break the sorted order bisect relies on
+    values = view[:n]
+    hit = bytearray(hi - lo + 1)
+    try:
+        for i in range(start, stop):
+            val = values[i]
+            # the complement has to come after val, so every pair is only counted once and val + val is skipped
+            lowerBound = max(bisect.bisect_left(values, lo - val), i + 1)
+            upperBound = bisect.bisect_right(values, hi - val)
+            base = val - lo
+            for j in range(lowerBound, upperBound):
+                hit[base + values[j]] = 1
+    finally:
+        values.release()
+        view.release()
+        shm.close()
+    return hit
+
+
+# 3-SUM over a target range
+def threeSumRange(fileName, targetRange, workers=None):
+    return countTargets3Sum(readNumbers(fileName), -targetRange, targetRange, workers)
+
+def countTargets3Sum(numbers, lo, hi, workers=None, tasksPerWorker=4):
+    # number of targets t in [lo, hi] such that x+y+z=t for distinct numbers x, y, z
+    # built on the same sorted array as twoSumRange (deduplicated, since only distinct values can be used)
+    # for every outer number x the pairs y+z in [lo-x, hi-x] are found with a two pointer sweep,
+    # so the whole search is O(n^2) plus the number of hits instead of cubic
+    # the outer indices are split over a process pool, every worker marks its targets in its own bytearray bitmap
+    # and the bitmaps are OR'ed together at the end
+    if hi < lo:
+        return 0
+    values = sorted(set(numbers))
+    n = len(values)
+
+    if not workers or workers <= 1 or n < 2:
+        _init3Sum(values, lo, hi)
+        return sum(_sweep3Sum((0, n, 1)))
+
+    # every task takes an interleaved slice of the outer indices, the small indices have the most work
+    # so interleaving keeps the tasks balanced
+    stride = min(n, workers * tasksPerWorker)
+    with multiprocessing.Pool(workers, initializer=_init3Sum, initargs=(values, lo, hi)) as pool:
+        bitmaps = pool.map(_sweep3Sum, [(start, n, stride) for start in range(stride)])
+    return sum(orBitmaps(bitmaps))
+
+# sorted values and target interval of the current process, set once by the pool initializer
+_values3Sum = None
+_interval3Sum = None
+
+def _init3Sum(values, lo, hi):
+    global _values3Sum, _interval3Sum
+    _values3Sum = values
+    _interval3Sum = (lo, hi)
+
+def _sweep3Sum(task):
+    # marks the targets of every outer index start, start+stride, start+2*stride, ... < stop
+    start, stop, stride = task
+    values = _values3Sum
+    lo, hi = _interval3Sum
+    n = len(values)
+    hit = bytearray(hi - lo + 1)
+
+    for i in range(start, stop, stride):
+        x = values[i]
+        pairLo = lo - x
+        pairHi = hi - x
+        # k pointers for the smallest j, both only move left as j moves right since values is sorted
+        kLow = n
+        kHigh = n - 1
+        for j in range(i + 1, n - 1):
+            y = values[j]
+            # highest k with y+z <= pairHi
+            while kHigh > j and y + values[kHigh] > pairHi:
+                kHigh -= 1
+            if kHigh <= j:
+                # no z > y is small enough, and it only gets worse for larger y
+                break
+            # lowest k with y+z >= pairLo
+            while kLow > j + 1 and y + values[kLow - 1] >= pairLo:
+                kLow -= 1
+            base = x + y - lo
+            for k in range(max(kLow, j + 1), kHigh + 1):
+                hit[base + values[k]] = 1
+    return hit
+
+def orBitmaps(bitmaps):
+    # OR a list of byte per target bitmaps together, through python ints so it runs in C
+    combined = 0
+    for bitmap in bitmaps:
+        combined |= int.from_bytes(bitmap, "little")
+    return combined.to_bytes(len(bitmaps[0]), "little") if bitmaps else b""
+
+
+def benchmark(n=10**6, targetRange=10000, spread=10**11):
+    # compare twoSumRange (bisect), twoSumRangeBucketed and twoSumRangeNumpy on n random numbers in [-spread, spread]
+    # the default matches the assignment, a small spread packs the values together and gives lots of hits
+    requireNumpy("benchmark")
+    numbers = np.random.randint(-spread, spread + 1, size=n, dtype=np.int64)
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = os.path.join(directory, "2sum.txt")
+        np.savetxt(fileName, numbers, fmt="%d")
+
+        times = {}
+        answers = {}
+        for name, engine in [("twoSumRange", twoSumRange), ("twoSumRangeBucketed", twoSumRangeBucketed), ("twoSumRangeNumpy", twoSumRangeNumpy)]:
+            start = time.perf_counter()
+            answers[name] = engine(fileName, targetRange)
+            times[name] = time.perf_counter() - start
+            print("%s: %i targets in %.2fs" % (name, answers[name], times[name]))
+
+    if len(set(answers.values())) != 1:
+        raise AssertionError("the engines disagree: %s" % answers)
+    return times
 
 
-ans = twoSumRange("2sum.txt", 10000)
-print(ans)
+if __name__ == "__main__":
+    ans = twoSumRange("2sum.txt", 10000)
+    print(ans)
 
 
 
@@ -10,6 +10,24 @@ So: what's the product of the following two 64-digit numbers?
 2718281828459045235360287471352662497757247093699959574966967627
 """
 
+import collections
+import decimal
+import math
+import mmap
+import multiprocessing
+import random
+import sys
+import time
+import timeit
+
+# number of bits needed per decimal digit
+LOG2_10 = math.log2(10)
+
+# prime 2^64 - 2^32 + 1 used by the number theoretic transform, 7 generates its multiplicative group
+# it has roots of unity for every power of two length up to 2^32
+NTT_MOD = 0xFFFFFFFF00000001
+NTT_ROOT = 7
+
 class Multiply(object):
     def karatsuba(self, x, y):
         if x < 10 or y < 10:
@@ -30,7 +48,515 @@ class Multiply(object):
         
         return ((10 ** n) * ac) + bn * adbc + bd
 
+    # below this many bits the native multiplication is faster than another level of recursion
+    # the default was picked with tuneThreshold() on a typical machine, rerun it to retune
+    binaryThreshold = 2048
+
+    def karatsubaBinary(self, x, y):
+        # same recursion as karatsuba but the numbers are split into binary limbs
+        # bit_length, shifts and masks are all linear, unlike len(str(x)) and powers of ten
+        negative = (x < 0) != (y < 0)
+        product = self._karatsubaBinary(abs(x), abs(y))
+        return -product if negative else product
+
+    def _karatsubaBinary(self, x, y):
+        # get the longest number of bits
+        n = max(x.bit_length(), y.bit_length())
+        if n <= self.binaryThreshold:
+            return x * y
+
+        # split on half the bits ex: x = a * 2^half + b
+        half = n >> 1
+        mask = (1 << half) - 1
+        a, b = x >> half, x & mask
+        c, d = y >> half, y & mask
+        ac = self._karatsubaBinary(a, c)
+        bd = self._karatsubaBinary(b, d)
+        adbc = self._karatsubaBinary(a + b, c + d) - ac - bd
+
+        return (ac << (2 * half)) + (adbc << half) + bd
+
+    # with backend="auto", multiply() uses the backend with the largest threshold below the operand size in bits
+    # the defaults come from tuneBackends() with CPython 3.11: the binary karatsuba never beat the builtin *,
+    # toom3 starts winning around half a million bits, and the pure python ntt is more than 50x slower than both
+    # so it is never picked automatically, rerun tuneBackends() to retune
+    karatsubaThreshold = math.inf
+    toomThreshold = 500000
+    nttThreshold = math.inf
+
+    def toom3(self, x, y):
+        # toom-cook 3: split each number into three binary limbs instead of two
+        # 5 recursive multiplications of 1/3 size instead of karatsuba's 3 of 1/2 size
+        negative = (x < 0) != (y < 0)
+        product = self._toom3(abs(x), abs(y))
+        return -product if negative else product
+
+    def _toom3(self, x, y):
+        n = max(x.bit_length(), y.bit_length())
+        if n <= self.binaryThreshold:
+            return x * y
+
+        # x = x2 * B^2 + x1 * B + x0 where B = 2^k
+        k = (n + 2) // 3
+        mask = (1 << k) - 1
+        x0, x1, x2 = x & mask, (x >> k) & mask, x >> (2 * k)
+        y0, y1, y2 = y & mask, (y >> k) & mask, y >> (2 * k)
+
+        # evaluate both polynomials at 0, 1, -1, -2 and infinity
+        # the evaluations at -1 and -2 can be negative so recurse through toom3 to handle the sign
+        r0 = self._toom3(x0, y0)
+        r1 = self._toom3(x0 + x1 + x2, y0 + y1 + y2)
+        rm1 = self.toom3(x0 - x1 + x2, y0 - y1 + y2)
+        rm2 = self.toom3(x0 - 2 * x1 + 4 * x2, y0 - 2 * y1 + 4 * y2)
+        rinf = self._toom3(x2, y2)
+
+        # interpolate the coefficients of the product polynomial (bodrato's sequence), every division is exact
+        c3 = (rm2 - r1) // 3
+        c1 = (r1 - rm1) >> 1
+        c2 = rm1 - r0
+        c3 = ((c2 - c3) >> 1) + 2 * rinf
+        c2 = c2 + c1 - rinf
+        c1 = c1 - c3
+
+        return r0 + (c1 << k) + (c2 << (2 * k)) + (c3 << (3 * k)) + (rinf << (4 * k))
+
+    def karatsubaSquare(self, x):
+        # x * x with the binary karatsuba split, 3 recursive squares: a^2, b^2 and (a+b)^2
+        return self._karatsubaSquare(abs(x))
+
+    def _karatsubaSquare(self, x):
+        n = x.bit_length()
+        if n <= self.binaryThreshold:
+            return x * x
+
+        half = n >> 1
+        a, b = x >> half, x & ((1 << half) - 1)
+        aa = self._karatsubaSquare(a)
+        bb = self._karatsubaSquare(b)
+        ab2 = self._karatsubaSquare(a + b) - aa - bb
+
+        return (aa << (2 * half)) + (ab2 << half) + bb
+
+    def toom3Square(self, x):
+        # x * x with toom-cook 3, the polynomial is only evaluated once and every point is a recursive square
+        return self._toom3Square(abs(x))
+
+    def _toom3Square(self, x):
+        n = x.bit_length()
+        if n <= self.binaryThreshold:
+            return x * x
+
+        k = (n + 2) // 3
+        mask = (1 << k) - 1
+        x0, x1, x2 = x & mask, (x >> k) & mask, x >> (2 * k)
+
+        # a square is never negative so the evaluations at -1 and -2 can be squared by their absolute value
+        r0 = self._toom3Square(x0)
+        r1 = self._toom3Square(x0 + x1 + x2)
+        rm1 = self._toom3Square(abs(x0 - x1 + x2))
+        rm2 = self._toom3Square(abs(x0 - 2 * x1 + 4 * x2))
+        rinf = self._toom3Square(x2)
+
+        # same interpolation as _toom3
+        c3 = (rm2 - r1) // 3
+        c1 = (r1 - rm1) >> 1
+        c2 = rm1 - r0
+        c3 = ((c2 - c3) >> 1) + 2 * rinf
+        c2 = c2 + c1 - rinf
+        c1 = c1 - c3
+
+        return r0 + (c1 << k) + (c2 << (2 * k)) + (c3 << (3 * k)) + (rinf << (4 * k))
+
+    def nttSquare(self, x):
+        # passing the same object twice makes ntt transform it only once
+        return self.ntt(x, x)
+
+    def square(self, x, backend="auto"):
+        # x * x with the squaring version of a backend, picked like multiply() does
+        if backend == "auto":
+            backend = self.autoBackend(abs(x).bit_length())
+        return self.squareBackends()[backend](x)
+
+    def squareBackends(self):
+        return {
+            "builtin": lambda x: x * x,
+            "decimal": lambda x: self.karatsuba(x, x),
+            "karatsuba": self.karatsubaSquare,
+            "toom3": self.toom3Square,
+            "ntt": self.nttSquare,
+        }
+
+    def ntt(self, x, y, limbBits=16):
+        # multiply by convolving the binary limbs of x and y with a number theoretic transform
+        # the convolution is exact as long as every coefficient, at most count * 2^(2*limbBits), stays below NTT_MOD
+        negative = (x < 0) != (y < 0)
+        x, y = abs(x), abs(y)
+        if x == 0 or y == 0:
+            return 0
+
+        a = self._toLimbs(x, limbBits)
+        b = a if x is y else self._toLimbs(y, limbBits)
+        size = 1
+        while size < len(a) + len(b):
+            size <<= 1
+        if size * (1 << (2 * limbBits)) >= NTT_MOD:
+            raise ValueError("operands are too large for %i bit limbs, use a smaller limbBits" % limbBits)
+
+        a += [0] * (size - len(a))
+        self._transform(a, False)
+        if b is a:
+            # squaring, the operand is only transformed once
+            c = [(ai * ai) % NTT_MOD for ai in a]
+        else:
+            b += [0] * (size - len(b))
+            self._transform(b, False)
+            c = [(ai * bi) % NTT_MOD for ai, bi in zip(a, b)]
+        self._transform(c, True)
+
+        # carries are handled by adding the shifted coefficients back together
+        product = self._fromLimbs(c, limbBits)
+        return -product if negative else product
+
+    def _toLimbs(self, x, limbBits):
+        # little endian list of limbBits sized pieces of x
+        mask = (1 << limbBits) - 1
+        return [(x >> shift) & mask for shift in range(0, x.bit_length(), limbBits)]
+
+    def _fromLimbs(self, limbs, limbBits):
+        # recombine pairs of neighbouring limbs so the shifts stay balanced
+        while len(limbs) > 1:
+            if len(limbs) % 2:
+                limbs.append(0)
+            limbs = [limbs[i] + (limbs[i + 1] << limbBits) for i in range(0, len(limbs), 2)]
+            limbBits *= 2
+        return limbs[0]
+
+    def _transform(self, a, inverse):
+        # iterative in place cooley-tukey transform over the integers mod NTT_MOD
+        n = len(a)
+
+        # bit reversal permutation
+        j = 0
+        for i in range(1, n):
+            bit = n >> 1
+            while j & bit:
+                j ^= bit
+                bit >>= 1
+            j |= bit
+            if i < j:
+                a[i], a[j] = a[j], a[i]
+
+        length = 2
+        while length <= n:
+            # principal length-th root of unity, inverted for the inverse transform
+            w = pow(NTT_ROOT, (NTT_MOD - 1) // length, NTT_MOD)
+            if inverse:
+                w = pow(w, NTT_MOD - 2, NTT_MOD)
+            half = length >> 1
+            powers = [1] * half
+            for i in range(1, half):
+                powers[i] = powers[i - 1] * w % NTT_MOD
+            for start in range(0, n, length):
+                for i in range(half):
+                    u = a[start + i]
+                    v = a[start + i + half] * powers[i] % NTT_MOD
+                    a[start + i] = (u + v) % NTT_MOD
+                    a[start + i + half] = (u - v) % NTT_MOD
+            length <<= 1
+
+        if inverse:
+            nInverse = pow(n, NTT_MOD - 2, NTT_MOD)
+            for i in range(n):
+                a[i] = a[i] * nInverse % NTT_MOD
+
+    def multiply(self, x, y, backend="auto"):
+        # pick a backend by name, or by the size of the larger operand when backend is "auto"
+        if backend == "auto":
+            backend = self.autoBackend(max(abs(x).bit_length(), abs(y).bit_length()))
+        return self.backends()[backend](x, y)
+
+    def autoBackend(self, bits):
+        # name of the backend multiply() uses for operands of this many bits
+        thresholds = [("builtin", 0), ("karatsuba", self.karatsubaThreshold),
+                      ("toom3", self.toomThreshold), ("ntt", self.nttThreshold)]
+        return max((threshold, name) for name, threshold in thresholds if threshold < bits or name == "builtin")[1]
+
+    def product(self, numbers, backend="auto", square=True):
+        # multiply all of the numbers together with a balanced product tree
+        # numbers can be any iterable, including a generator reading from a file, since it is only walked once
+        # the stack works like a binary counter: two partial products are only combined when they cover the same number of inputs
+        # so the stack never holds more than log2(n) partial products and each multiplication is on similar sized operands
+        stack = []
+        for number in numbers:
+            level = 0
+            while stack and stack[-1][0] == level:
+                _, other = stack.pop()
+                number = self._multiplyPair(other, number, backend, square)
+                level += 1
+            stack.append((level, number))
+
+        # fold whatever is left, smallest partial products first
+        result = 1
+        while stack:
+            _, number = stack.pop()
+            result = self._multiplyPair(number, result, backend, square)
+        return result
+
+    def _multiplyPair(self, x, y, backend, square):
+        # squaring fast path: every backend has a square that does less work than a general multiplication
+        if square and x == y:
+            return self.square(x, backend)
+        return self.multiply(x, y, backend)
+
+    def backends(self):
+        # every multiplication backend by name, useful for cross checks and benchmarks
+        return {
+            "builtin": lambda x, y: x * y,
+            "decimal": self.karatsuba,
+            "karatsuba": self.karatsubaBinary,
+            "toom3": self.toom3,
+            "ntt": self.ntt,
+        }
+
+    def tuneThreshold(self, digits=20000, candidates=(256, 512, 1024, 2048, 4096, 8192, 16384), repeat=3):
+        # time karatsubaBinary on two random numbers with the given number of digits for every candidate threshold
+        # keep the fastest threshold and return it
+        x = random.getrandbits(int(digits * LOG2_10)) | 1
+        y = random.getrandbits(int(digits * LOG2_10)) | 1
+        best, bestTime = self.binaryThreshold, None
+        for threshold in candidates:
+            self.binaryThreshold = threshold
+            elapsed = min(timeit.repeat(lambda: self.karatsubaBinary(x, y), number=1, repeat=repeat))
+            if bestTime is None or elapsed < bestTime:
+                best, bestTime = threshold, elapsed
+        self.binaryThreshold = best
+        return best
+
+    def tuneBackends(self, bitSizes=(10**4, 3 * 10**4, 10**5, 3 * 10**5, 10**6, 3 * 10**6), includeNtt=False, repeat=3):
+        # time every backend on random operands of each size and set the thresholds used by multiply(backend="auto")
+        # a backend takes over above the last size it lost at, when it wins at the next size
+        # the ntt is only timed with includeNtt since it is very slow in pure python
+        names = ["builtin", "karatsuba", "toom3"] + (["ntt"] if includeNtt else [])
+        backends = self.backends()
+        winners = []
+        for bits in sorted(bitSizes):
+            x = random.getrandbits(bits) | 1
+            y = random.getrandbits(bits) | 1
+            times = {name: min(timeit.repeat(lambda: backends[name](x, y), number=1, repeat=repeat)) for name in names}
+            winners.append((bits, min(times, key=times.get)))
+
+        thresholds = {"karatsuba": math.inf, "toom3": math.inf, "ntt": math.inf}
+        previousBits, previousWinner = 0, "builtin"
+        for bits, winner in winners:
+            if winner != previousWinner and winner != "builtin":
+                thresholds[winner] = min(thresholds[winner], previousBits)
+            previousBits, previousWinner = bits, winner
+        self.karatsubaThreshold = thresholds["karatsuba"]
+        self.toomThreshold = thresholds["toom3"]
+        self.nttThreshold = thresholds["ntt"]
+        return winners
+
+    def benchmark(self, digitCounts=(10**3, 10**4, 10**5, 10**6), decimalMaxDigits=10**4, repeat=1):
+        # compare the decimal karatsuba, the binary karatsuba and the builtin * on random operands
+        # the decimal path is quadratic in the number of digits so it is skipped above decimalMaxDigits
+        # python 3.11+ refuses to convert ints with more than 4300 digits to str by default, which the decimal path does,
+        # so the limit is lifted for the benchmark and put back afterwards
+        oldLimit = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else None
+        if oldLimit is not None:
+            sys.set_int_max_str_digits(0)
+        try:
+            return self._benchmark(digitCounts, decimalMaxDigits, repeat)
+        finally:
+            if oldLimit is not None:
+                sys.set_int_max_str_digits(oldLimit)
+
+    def _benchmark(self, digitCounts, decimalMaxDigits, repeat):
+        results = []
+        for digits in digitCounts:
+            x = random.randrange(10 ** (digits - 1), 10 ** digits)
+            y = random.randrange(10 ** (digits - 1), 10 ** digits)
+            row = {"digits": digits}
+            if digits <= decimalMaxDigits:
+                row["decimal"] = min(timeit.repeat(lambda: self.karatsuba(x, y), number=1, repeat=repeat))
+            else:
+                row["decimal"] = None
+            row["binary"] = min(timeit.repeat(lambda: self.karatsubaBinary(x, y), number=1, repeat=repeat))
+            row["builtin"] = min(timeit.repeat(lambda: x * y, number=1, repeat=repeat))
+            results.append(row)
+
+            decimalTime = "skipped" if row["decimal"] is None else "%.4fs" % row["decimal"]
+            print("%8i digits: decimal %s, binary %.4fs, builtin %.4fs" % (digits, decimalTime, row["binary"], row["builtin"]))
+        return results
+
+
+# numbers with at most this many decimal digits are converted with the builtin int() and str()
+DIGIT_LEAF = 512
+
+def readNumber(fileName):
+    # read a decimal number from a digit file through mmap
+    # CPython's int(str) is quadratic in the number of digits, so the digits are split with a power tree instead:
+    # the right part always has DIGIT_LEAF * 2^i digits and the two halves are combined as left * 10^len(right) + right
+    with open(fileName, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as digits:
+            start, end = 0, len(digits)
+            # skip leading and trailing whitespace and the new line character
+            while start < end and digits[start:start + 1].isspace():
+                start += 1
+            while end > start and digits[end - 1:end].isspace():
+                end -= 1
+            negative = digits[start:start + 1] == b"-"
+            if negative or digits[start:start + 1] == b"+":
+                start += 1
+            if start == end or not digits[start:end].isdigit():
+                raise ValueError("%s does not contain a decimal number" % fileName)
+
+            number = _digitsToInt(digits, start, end, {})
+    return -number if negative else number
+
+def _digitsToInt(digits, start, end, powers):
+    length = end - start
+    if length <= DIGIT_LEAF:
+        return int(digits[start:end])
+
+    # largest DIGIT_LEAF * 2^i that leaves something for the left half
+    rightLength = DIGIT_LEAF
+    while rightLength * 2 < length:
+        rightLength *= 2
+    if rightLength not in powers:
+        powers[rightLength] = 10 ** rightLength
+
+    left = _digitsToInt(digits, start, end - rightLength, powers)
+    right = _digitsToInt(digits, end - rightLength, end, powers)
+    return left * powers[rightLength] + right
+
+def writeNumber(fileName, number, chunkDigits=1 << 20):
+    # write a number in decimal, streaming the digits to disk in chunks of chunkDigits
+    with open(fileName, "w") as f:
+        if number < 0:
+            f.write("-")
+            number = -number
+        for piece in iterDigits(number, chunkDigits):
+            f.write(piece)
+        f.write("\n")
+
+def iterDigits(number, chunkDigits=1 << 20):
+    # generator over the decimal digits of a non negative number, in order, chunkDigits at a time
+    # dividing by a power tree of 10^k with int divmod doesn't help: CPython's long division is schoolbook, so quadratic too
+    # instead the number is converted to a decimal.Decimal with a power tree of 2^k (the same approach as CPython 3.12's _pylong):
+    # libmpdec multiplies big decimals with a number theoretic transform, so the conversion is subquadratic,
+    # and str() of a Decimal is linear since its digits are already stored in base 10
+    digits = str(toDecimal(number))
+    for start in range(0, len(digits), chunkDigits):
+        yield digits[start:start + chunkDigits]
+
+# numbers with at most this many bits are converted to Decimal directly
+DECIMAL_LEAF_BITS = 128
+
+def toDecimal(number):
+    # exact Decimal of a non negative int, split on bits: number = high * 2^half + low
+    with decimal.localcontext() as context:
+        # no rounding at any size, and fail loudly instead of ever rounding silently
+        context.prec = decimal.MAX_PREC
+        context.Emax = decimal.MAX_EMAX
+        context.Emin = decimal.MIN_EMIN
+        context.traps[decimal.Inexact] = True
+        powers = {}
+        return _toDecimal(number, number.bit_length(), powers)
+
+def _toDecimal(number, bits, powers):
+    if bits <= DECIMAL_LEAF_BITS:
+        return decimal.Decimal(number)
+    half = bits >> 1
+    high = number >> half
+    low = number - (high << half)
+    return _toDecimal(low, half, powers) + _toDecimal(high, bits - half, powers) * _powerOfTwo(half, powers)
+
+def _powerOfTwo(exponent, powers):
+    # 2^exponent as a Decimal, cached since the same exponents come back all over the tree
+    result = powers.get(exponent)
+    if result is None:
+        if exponent <= DECIMAL_LEAF_BITS:
+            result = decimal.Decimal(2) ** exponent
+        elif exponent - 1 in powers:
+            result = powers[exponent - 1] * 2
+        else:
+            half = exponent >> 1
+            result = _powerOfTwo(half, powers) * _powerOfTwo(exponent - half, powers)
+        powers[exponent] = result
+    return result
+
+def multiplyFiles(xFileName, yFileName, outFileName, backend="auto"):
+    # multiply two numbers stored in digit files and write the product to outFileName
+    m = Multiply()
+    product = m.multiply(readNumber(xFileName), readNumber(yFileName), backend)
+    writeNumber(outFileName, product)
+    return product
+
+
+def _multiplyChunk(args):
+    # worker side of multiplyBatch, runs in a separate process so it has to be a module level function
+    pairs, backend = args
+    m = Multiply()
+    return [m.multiply(x, y, backend) for x, y in pairs]
+
+def readPairs(fileName):
+    # generator over the operand pairs in a file, one "x y" pair per line
+    with open(fileName, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                x, y = line.split()
+                yield int(x), int(y)
+
+def multiplyBatch(pairs, workers=None, chunkSize=1000, backend="auto", maxInFlight=None):
+    # multiply every (x, y) pair over a process pool, pairs can be an iterator or a file name
+    # returns the products in the same order as the pairs
+    return list(iterMultiplyBatch(pairs, workers, chunkSize, backend, maxInFlight))
+
+def iterMultiplyBatch(pairs, workers=None, chunkSize=1000, backend="auto", maxInFlight=None):
+    # generator version of multiplyBatch, yields the products in order as they're ready
+    # the pairs are submitted in chunks so the per task overhead is shared across many multiplications,
+    # and at most maxInFlight chunks (2 per worker by default) are submitted and not yet collected,
+    # so a big pairs file is read as the results come back instead of all at once into the task queue
+    if isinstance(pairs, str):
+        pairs = readPairs(pairs)
+    workers = workers or multiprocessing.cpu_count()
+    maxInFlight = maxInFlight or 2 * workers
+
+    def chunks():
+        chunk = []
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) == chunkSize:
+                yield chunk, backend
+                chunk = []
+        if chunk:
+            yield chunk, backend
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for task in chunks():
+            if len(pending) == maxInFlight:
+                yield from pending.popleft().get()
+            pending.append(pool.apply_async(_multiplyChunk, (task,)))
+        while pending:
+            yield from pending.popleft().get()
+
+def multiplyBatchReport(pairs, workers=None, chunkSize=1000, backend="auto", maxInFlight=None):
+    # multiplyBatch along with its throughput in pairs and in result bytes per second, to size the worker count
+    # returns the products and a dict with the report
+    start = time.perf_counter()
+    results = multiplyBatch(pairs, workers, chunkSize, backend, maxInFlight)
+    elapsed = time.perf_counter() - start
+
+    resultBytes = sum((abs(r).bit_length() + 7) // 8 for r in results)
+    pairsPerSec = len(results) / elapsed if elapsed else float("inf")
+    bytesPerSec = resultBytes / elapsed if elapsed else float("inf")
+    print("%i pairs in %.3fs: %.1f pairs/sec, %.1f bytes/sec" % (len(results), elapsed, pairsPerSec, bytesPerSec))
+    return results, {"pairs": len(results), "seconds": elapsed, "pairsPerSec": pairsPerSec, "bytesPerSec": bytesPerSec}
+
     
-m = Multiply()
-print(m.karatsuba(3141592653589793238462643383279502884197169399375105820974944592, 2718281828459045235360287471352662497757247093699959574966967627))
+if __name__ == "__main__":
+    m = Multiply()
+    print(m.karatsuba(3141592653589793238462643383279502884197169399375105820974944592, 2718281828459045235360287471352662497757247093699959574966967627))
 
@@ -87,6 +87,83 @@ class MaxWeightIndependentSet:
             
         
 
-s = MaxWeightIndependentSet("mwis.txt")
-maxWeight, output = s.calcMaxWeight()
-print("max weight: %i, output string: %s" % (maxWeight, output))
+class StreamingMaxWeightIndependentSet:
+    # same dynamic programming as MaxWeightIndependentSet for path graphs with hundreds of millions of vertices
+    # the weights are streamed from the file instead of kept in a list, and the cache only keeps the two previous values
+    # the only thing remembered per vertex is the decision "case 2 wins" as one bit in a packed bytearray,
+    # which is all the reconstruction needs
+    def __init__(self, fileName):
+        self.fileName = fileName
+
+    def calcMaxWeight(self, vertices=(1, 2, 3, 4, 17, 117, 517, 997)):
+        f = open(self.fileName, "r")
+        self.vertexCount = int(f.readline().split(" ")[0])
+        # bit i is set when vertex i is included at step i
+        decisions = bytearray((self.vertexCount >> 3) + 1)
+
+        # max weights at i-2 and i-1
+        beforePrevious = previous = 0
+        i = 0
+        for line in f:
+            i += 1
+            weight = int(line.rstrip('\n'))
+            # same cases as calcMaxWeight, ties don't include the vertex just like getPath
+            if beforePrevious + weight > previous:
+                decisions[i >> 3] |= 1 << (i & 7)
+                beforePrevious, previous = previous, beforePrevious + weight
+            else:
+                beforePrevious = previous
+        f.close()
+
+        maxWeight = previous
+        self.path = self.getPath(decisions, i)
+
+        outputString = ""
+        for i in vertices:
+            outputString += str(1) if i in self.path else str(0)
+
+        return maxWeight, outputString
+
+    def getPath(self, decisions, vertexCount):
+        path = VertexBitmap(vertexCount)
+        i = vertexCount
+
+        # traverse the path right to left, same as getPath but reading the decision bits
+        while i > 0:
+            if decisions[i >> 3] >> (i & 7) & 1:
+                path.add(i)
+                i -= 2
+            else:
+                i -= 1
+
+        return path
+
+class VertexBitmap:
+    # set of vertices 1..vertexCount stored as one bit per vertex, membership is O(1)
+    def __init__(self, vertexCount):
+        self.bits = bytearray((vertexCount >> 3) + 1)
+        self.size = 0
+
+    def add(self, vertex):
+        if not self.bits[vertex >> 3] >> (vertex & 7) & 1:
+            self.bits[vertex >> 3] |= 1 << (vertex & 7)
+            self.size += 1
+
+    def __contains__(self, vertex):
+        return 0 <= vertex < len(self.bits) << 3 and bool(self.bits[vertex >> 3] >> (vertex & 7) & 1)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for byteIndex, byte in enumerate(self.bits):
+            while byte:
+                low = byte & -byte
+                yield (byteIndex << 3) + low.bit_length() - 1
+                byte ^= low
+
+
+if __name__ == "__main__":
+    s = MaxWeightIndependentSet("mwis.txt")
+    maxWeight, output = s.calcMaxWeight()
+    print("max weight: %i, output string: %s" % (maxWeight, output))
@@ -8,7 +8,21 @@ In the box below you should type the sum of these 10000 medians, modulo 10000 (i
 That is, you should compute (m_1+m_2+m_3 + ...+ m_10000) mod 10000
 """
 
+import asyncio
+import bisect
+import collections
 import heapq
+import math
+import multiprocessing
+import os
+import pickle
+import queue
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
 
 def medianMaintenance(fileName):
     # max heap used to keep track of the smallest numbers
@@ -52,9 +66,642 @@ def medianMaintenance(fileName):
 
     return sum % 10000
 
+def readNumbers(fileName):
+    # generator over the numbers in the file, one per line
+    with open(fileName, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield int(line)
 
-ans = medianMaintenance("median.txt")
-print(ans)
+
+def slidingMedians(numbers, k):
+    # rolling median over the last k numbers of the stream, yields one median per number
+    # same convention as medianMaintenance, the median is the max of the lowHeap (the lower median for an even count)
+    # evicted numbers are not searched for in the heaps, they are only counted in the delayed map of their heap
+    # and thrown away when they reach the top of it
+    # stale numbers buried below the top would pile up on a monotonic stream, so a heap is rebuilt from its live numbers
+    # once the stale ones outnumber them: the heaps never hold more than about 2k numbers and every step is O(log k) amortized
+    if k < 1:
+        raise ValueError("window size must be at least 1")
+
+    lowHeap = []
+    highHeap = []
+    # number of valid (not yet evicted) elements in each heap
+    lowSize = highSize = 0
+    # evicted numbers still sitting in each heap, by value as it is stored in the heap (negated for the lowHeap)
+    lowDelayed = {}
+    highDelayed = {}
+    window = collections.deque()
+
+    def prune(heap, delayed):
+        # pop evicted numbers off the top of the heap
+        while heap and delayed.get(heap[0], 0):
+            stored = heapq.heappop(heap)
+            delayed[stored] -= 1
+            if not delayed[stored]:
+                del delayed[stored]
+
+    def compact(heap, delayed, size):
+        # rebuild the heap without its evicted numbers when they are more than half of it
+        if len(heap) > 2 * size:
+            live = []
+            for stored in heap:
+                if delayed.get(stored, 0):
+                    delayed[stored] -= 1
+                else:
+                    live.append(stored)
+            delayed.clear()
+            heapq.heapify(live)
+            heap[:] = live
+
+    for number in numbers:
+        window.append(number)
+        if not lowHeap or number <= -lowHeap[0]:
+            heapq.heappush(lowHeap, -number)
+            lowSize += 1
+        else:
+            heapq.heappush(highHeap, number)
+            highSize += 1
+
+        if len(window) > k:
+            old = window.popleft()
+            # everything in the lowHeap is <= everything in the highHeap, so the value says which heap it's in
+            if old <= -lowHeap[0]:
+                lowDelayed[-old] = lowDelayed.get(-old, 0) + 1
+                lowSize -= 1
+                prune(lowHeap, lowDelayed)
+            else:
+                highDelayed[old] = highDelayed.get(old, 0) + 1
+                highSize -= 1
+                prune(highHeap, highDelayed)
+
+        # rebalancing step, same as medianMaintenance: the lowHeap has as many elements or one more than the highHeap
+        if lowSize > highSize + 1:
+            heapq.heappush(highHeap, -heapq.heappop(lowHeap))
+            lowSize -= 1
+            highSize += 1
+            prune(lowHeap, lowDelayed)
+        elif lowSize < highSize:
+            heapq.heappush(lowHeap, -heapq.heappop(highHeap))
+            lowSize += 1
+            highSize -= 1
+            prune(highHeap, highDelayed)
+
+        compact(lowHeap, lowDelayed, lowSize)
+        compact(highHeap, highDelayed, highSize)
+
+        yield -lowHeap[0]
+
+
+def checkSlidingMemory(n=10**6, k=5, limit=1 << 16):
+    # peak memory of slidingMedians on increasing and decreasing streams, the worst case for the delayed evictions:
+    # every evicted number is buried below the top of its heap, so without the rebuilds the heaps would keep all n numbers
+    peaks = []
+    for stream in (range(n), range(n, 0, -1)):
+        tracemalloc.start()
+        try:
+            for _ in slidingMedians(stream, k):
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    if max(peaks) > limit:
+        raise AssertionError("slidingMedians kept %i bytes for a window of %i" % (max(peaks), k))
+    print("%i numbers, window %i: peak %i bytes increasing, %i bytes decreasing" % (n, k, peaks[0], peaks[1]))
+    return peaks
+
+
+def prefixMedians(numbers):
+    # generator version of medianMaintenance, yields the median of x_1..x_k for every k
+    lowHeap = []
+    highHeap = []
+    for number in numbers:
+        heapq.heappush(lowHeap, -number)
+        heapq.heappush(highHeap, -heapq.heappop(lowHeap))
+        if len(lowHeap) < len(highHeap):
+            heapq.heappush(lowHeap, -heapq.heappop(highHeap))
+        yield -lowHeap[0]
+
+
+class QuantileSketch:
+    # approximate quantiles of a never ending stream in constant memory (a merging t-digest)
+    # the numbers are summarised as centroids (mean, count), at most about compression of them no matter how long the stream is
+    # centroids are kept small near the tails and large near the median, so the rank error is about 1/compression at the median
+    # and much smaller for extreme quantiles like p99, use errorBound to pick the compression for a target rank error instead
+    def __init__(self, compression=100, errorBound=None):
+        if errorBound is not None:
+            compression = math.ceil(1 / errorBound)
+        self.compression = compression
+        self.means = []
+        self.counts = []
+        self.buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, number, count=1):
+        self.buffer.append((number, count))
+        self.count += count
+        self.min = min(self.min, number)
+        self.max = max(self.max, number)
+        if len(self.buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        # combine another sketch into this one, ie. the sketches of two shards of a stream
+        other._compress()
+        self.buffer.extend(zip(other.means, other.counts))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _scale(self, q):
+        # k1 scale function, a centroid may cover at most one unit of k
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self):
+        if not self.buffer:
+            return
+        points = sorted(list(zip(self.means, self.counts)) + self.buffer)
+        self.buffer = []
+
+        means = [points[0][0]]
+        counts = [points[0][1]]
+        seen = 0
+        kLow = self._scale(0)
+        for mean, count in points[1:]:
+            q = (seen + counts[-1] + count) / self.count
+            if self._scale(min(q, 1)) - kLow <= 1:
+                # fits in the current centroid, update its weighted mean
+                counts[-1] += count
+                means[-1] += (mean - means[-1]) * count / counts[-1]
+            else:
+                seen += counts[-1]
+                kLow = self._scale(seen / self.count)
+                means.append(mean)
+                counts.append(count)
+        self.means = means
+        self.counts = counts
+
+    def quantile(self, q):
+        # value at quantile q (0 <= q <= 1), interpolated between the centroid means
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+        self._compress()
+        if not self.count:
+            raise ValueError("the sketch is empty")
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = q * self.count
+        # each centroid's mean sits at the middle of its count
+        if target < self.counts[0] / 2:
+            return self.min + (self.means[0] - self.min) * target / (self.counts[0] / 2)
+        cumulative = self.counts[0] / 2
+        for i in range(1, len(self.means)):
+            step = (self.counts[i - 1] + self.counts[i]) / 2
+            if target < cumulative + step:
+                return self.means[i - 1] + (self.means[i] - self.means[i - 1]) * (target - cumulative) / step
+            cumulative += step
+        tail = self.counts[-1] / 2
+        return self.means[-1] + (self.max - self.means[-1]) * min(1, (target - cumulative) / tail)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def size(self):
+        # number of centroids held, the memory used by the sketch
+        self._compress()
+        return len(self.means)
+
+
+class CountingQuantiles:
+    # exact quantiles for a stream of integers from a bounded domain low..high, like the 1..10000 of this assignment
+    # instead of heaps, keep a count per value in a fenwick tree (binary indexed tree) stored in a compact array
+    # insert is O(log U) and the kth smallest number is found in O(log U) by walking down the tree, U = high - low + 1
+    def __init__(self, low, high):
+        if high < low:
+            raise ValueError("empty value domain %i..%i" % (low, high))
+        self.low = low
+        self.size = high - low + 1
+        # 1 based fenwick tree, tree[i] holds the count of the values in (i - lowbit(i), i]
+        self.tree = array("q", bytes(8 * (self.size + 1)))
+        self.count = 0
+        # largest power of two <= size, where the descent in kth starts
+        self.topBit = 1 << (self.size.bit_length() - 1)
+
+    def add(self, number, count=1):
+        i = number - self.low + 1
+        if not 1 <= i <= self.size:
+            raise ValueError("%i is outside of the value domain" % number)
+        self.count += count
+        tree = self.tree
+        while i <= self.size:
+            tree[i] += count
+            i += i & -i
+
+    def remove(self, number, count=1):
+        self.add(number, -count)
+
+    def kth(self, k):
+        # kth smallest number seen so far, 1 based
+        if not 1 <= k <= self.count:
+            raise ValueError("rank %i is out of range for %i numbers" % (k, self.count))
+        tree = self.tree
+        position = 0
+        bit = self.topBit
+        while bit:
+            nextPosition = position + bit
+            if nextPosition <= self.size and tree[nextPosition] < k:
+                position = nextPosition
+                k -= tree[nextPosition]
+            bit >>= 1
+        return position + self.low
+
+    def quantile(self, q):
+        # nearest rank quantile, the ceil(q * count)th smallest number
+        # for q = 0.5 this is the same median as medianMaintenance (the lower median for an even count)
+        return self.kth(max(1, math.ceil(q * self.count)))
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+def countingPercentiles(numbers, low, high, qs=(0.5, 0.95, 0.99)):
+    # yields the requested quantiles (p50, p95, p99 by default) after every number of the stream
+    counts = CountingQuantiles(low, high)
+    for number in numbers:
+        counts.add(number)
+        yield counts.quantiles(qs)
+
+
+class KeyedMedians:
+    # median maintenance for many independent streams, ie. one per endpoint
+    # each key holds the same lowHeap/highHeap pair as medianMaintenance, but as two array('q') instead of two lists:
+    # a list stores a pointer per number plus a separate int object, an array stores the 8 bytes of the number itself
+    # heapq only works on lists, so the arrays are kept in heap order with _siftUp/_siftDown
+    # both heaps are min heaps, the lowHeap holds the negated numbers like in medianMaintenance, and numbers must fit in int64
+    def __init__(self):
+        self.lowHeaps = {}
+        self.highHeaps = {}
+
+    def add(self, key, number):
+        for _, median in self.process(((key, number),)):
+            return median
+
+    def process(self, records):
+        # takes (key, number) records in bulk and yields (key, median of that key's stream so far) for each
+        # the insert and rebalancing step of medianMaintenance is inlined so there's no extra call per record
+        lowHeaps = self.lowHeaps
+        highHeaps = self.highHeaps
+        for key, number in records:
+            lowHeap = lowHeaps.get(key)
+            if lowHeap is None:
+                lowHeap = lowHeaps[key] = array("q")
+                highHeap = highHeaps[key] = array("q")
+            else:
+                highHeap = highHeaps[key]
+
+            # push -number onto the lowHeap and pop its largest number (heappushpop)
+            item = -number
+            if lowHeap and lowHeap[0] < item:
+                item, lowHeap[0] = lowHeap[0], item
+                _siftDown(lowHeap, 0)
+
+            # which goes to the highHeap
+            highHeap.append(-item)
+            _siftUp(highHeap, len(highHeap) - 1)
+
+            # the highHeap can't be bigger than the lowHeap, move its smallest number back
+            if len(lowHeap) < len(highHeap):
+                last = highHeap.pop()
+                if highHeap:
+                    smallest = highHeap[0]
+                    highHeap[0] = last
+                    _siftDown(highHeap, 0)
+                else:
+                    smallest = last
+                lowHeap.append(-smallest)
+                _siftUp(lowHeap, len(lowHeap) - 1)
+
+            yield key, -lowHeap[0]
+
+    def median(self, key):
+        return -self.lowHeaps[key][0]
+
+    def medians(self):
+        return {key: -lowHeap[0] for key, lowHeap in self.lowHeaps.items()}
+
+    def memoryPerKey(self):
+        # average bytes of heap state per key: the two arrays, not counting the dictionaries
+        if not self.lowHeaps:
+            return 0
+        total = sum(sys.getsizeof(heap) for heap in self.lowHeaps.values())
+        total += sum(sys.getsizeof(heap) for heap in self.highHeaps.values())
+        return total / len(self.lowHeaps)
+
+
+def _siftUp(heap, pos):
+    # move heap[pos] up to its place in a min heap
+    item = heap[pos]
+    while pos > 0:
+        parent = (pos - 1) >> 1
+        parentItem = heap[parent]
+        if item < parentItem:
+            heap[pos] = parentItem
+            pos = parent
+        else:
+            break
+    heap[pos] = item
+
+
+def _siftDown(heap, pos):
+    # move heap[pos] down to its place in a min heap
+    size = len(heap)
+    item = heap[pos]
+    child = 2 * pos + 1
+    while child < size:
+        if child + 1 < size and heap[child + 1] < heap[child]:
+            child += 1
+        if heap[child] < item:
+            heap[pos] = heap[child]
+            pos = child
+            child = 2 * pos + 1
+        else:
+            break
+    heap[pos] = item
+
+
+def listHeapsMemoryPerKey(lowHeap, highHeap):
+    # bytes used by the tuple of two lists layout of one key, including the int objects the lists point to
+    # (small ints up to 256 are shared by python and not counted)
+    total = sys.getsizeof((lowHeap, highHeap)) + sys.getsizeof(lowHeap) + sys.getsizeof(highHeap)
+    total += sum(sys.getsizeof(number) for number in lowHeap if not -5 <= number <= 256)
+    total += sum(sys.getsizeof(number) for number in highHeap if not -5 <= number <= 256)
+    return total
+
+
+def benchmarkKeyedMemory(keyCount=10000, valuesPerKey=100, maxValue=10**6):
+    # per key memory of KeyedMedians against the tuple of two heapq lists per key it replaced
+    records = [(key, random.randint(1, maxValue)) for _ in range(valuesPerKey) for key in range(keyCount)]
+    keyed = KeyedMedians()
+    start = time.perf_counter()
+    for _ in keyed.process(records):
+        pass
+    elapsed = time.perf_counter() - start
+
+    listBytes = 0
+    listHeaps = {}
+    for key, number in records:
+        lowHeap, highHeap = listHeaps.setdefault(key, ([], []))
+        heapq.heappush(highHeap, -heapq.heappushpop(lowHeap, -number))
+        if len(lowHeap) < len(highHeap):
+            heapq.heappush(lowHeap, -heapq.heappop(highHeap))
+    for lowHeap, highHeap in listHeaps.values():
+        listBytes += listHeapsMemoryPerKey(lowHeap, highHeap)
+    if {key: -lowHeap[0] for key, (lowHeap, _) in listHeaps.items()} != keyed.medians():
+        raise AssertionError("KeyedMedians disagrees with the heapq lists")
+
+    listPerKey = listBytes / keyCount
+    arrayPerKey = keyed.memoryPerKey()
+    print("%i keys x %i values: arrays %.0f bytes/key, lists %.0f bytes/key (%.1fx), %.0f records/sec" % (
+        keyCount, valuesPerKey, arrayPerKey, listPerKey, listPerKey / arrayPerKey, len(records) / elapsed))
+    return arrayPerKey, listPerKey
+
+
+def _medianShard(inQueue, outQueue):
+    # worker process owning the KeyedMedians state for its share of the keys
+    state = KeyedMedians()
+    while True:
+        batch = inQueue.get()
+        if batch is None:
+            outQueue.put(None)
+            return
+        outQueue.put(list(state.process(batch)))
+
+
+def shardedMedians(records, workers=4, batchSize=10000):
+    # KeyedMedians spread over worker processes, for streams too fast for one core
+    # every key always goes to the same worker, so the medians of a key come out in the order of its records
+    # (records of different keys can come out interleaved differently than they went in)
+    # the input queues are bounded so a slow shard holds the producer back instead of piling up batches in memory,
+    # the workers never block on the unbounded outQueue so the pipeline can't deadlock
+    inQueues = [multiprocessing.Queue(maxsize=2) for _ in range(workers)]
+    outQueue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_medianShard, args=(inQueue, outQueue), daemon=True) for inQueue in inQueues]
+    for process in processes:
+        process.start()
+
+    finished = 0
+
+    def ready():
+        # hand back whatever results are ready without waiting
+        nonlocal finished
+        while not outQueue.empty():
+            results = outQueue.get()
+            if results is None:
+                finished += 1
+            else:
+                yield from results
+
+    def put(shard, batch):
+        # while the shard's queue is full keep handing back results, so the caller is not starved meanwhile
+        while True:
+            try:
+                inQueues[shard].put(batch, timeout=0.05)
+                return
+            except queue.Full:
+                yield from ready()
+
+    pending = [[] for _ in range(workers)]
+    try:
+        for key, number in records:
+            shard = hash(key) % workers
+            pending[shard].append((key, number))
+            if len(pending[shard]) >= batchSize:
+                yield from put(shard, pending[shard])
+                pending[shard] = []
+                yield from ready()
+
+        for shard in range(workers):
+            if pending[shard]:
+                yield from put(shard, pending[shard])
+            yield from put(shard, None)
+
+        while finished < workers:
+            results = outQueue.get()
+            if results is None:
+                finished += 1
+            else:
+                yield from results
+    finally:
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+class MedianState:
+    # the state of medianMaintenance as an object so it can be snapshotted to disk and restored after a crash
+    # count is the number of numbers processed, the position to resume the input from
+    def __init__(self):
+        self.lowHeap = []
+        self.highHeap = []
+        self.sum = 0
+        self.count = 0
+
+    def add(self, number):
+        heapq.heappush(self.highHeap, -heapq.heappushpop(self.lowHeap, -number))
+        if len(self.lowHeap) < len(self.highHeap):
+            heapq.heappush(self.lowHeap, -heapq.heappop(self.highHeap))
+        median = -self.lowHeap[0]
+        self.sum += median
+        self.count += 1
+        return median
+
+    def snapshot(self):
+        return pickle.dumps((self.lowHeap, self.highHeap, self.sum, self.count), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def save(self, fileName):
+        writeCheckpoint(fileName, self.snapshot())
+
+    @classmethod
+    def load(cls, fileName):
+        # restore the last checkpoint, or start from scratch if there is none yet
+        state = cls()
+        if os.path.exists(fileName):
+            with open(fileName, "rb") as f:
+                state.lowHeap, state.highHeap, state.sum, state.count = pickle.load(f)
+        return state
+
+
+def writeCheckpoint(fileName, data):
+    # write to a temporary file and rename it over the old checkpoint
+    # so a crash in the middle of a write never leaves a half written checkpoint behind
+    # every write gets its own temporary file, two writes in flight never share or steal each other's file
+    fd, tempName = tempfile.mkstemp(prefix=os.path.basename(fileName) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(fileName) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tempName, fileName)
+    except BaseException:
+        os.unlink(tempName)
+        raise
+
+
+async def ingestMedians(reader, state=None, checkpointFile=None, checkpointEvery=100000, readSize=1 << 16,
+                        skipProcessed=False, onMedian=None):
+    # feed medianMaintenance from an asyncio StreamReader (a socket, a pipe, ...) instead of a blocking open
+    # the input is read in readSize batches and split into lines, keeping a partial last line for the next batch
+    # every checkpointEvery numbers the heaps are pickled to checkpointFile, and the disk write runs in a thread
+    # to resume after a crash pass the same checkpointFile: the state is reloaded and state.count says how far the input got,
+    # if the source can only restart from the beginning set skipProcessed to drop the numbers that are already counted
+    if state is None:
+        state = MedianState.load(checkpointFile) if checkpointFile else MedianState()
+    skip = state.count if skipProcessed else 0
+    pendingWrite = None
+    partial = b""
+
+    async def checkpoint():
+        nonlocal pendingWrite
+        if pendingWrite is not None:
+            await pendingWrite
+        # the snapshot is taken now, only the write happens in the background
+        pendingWrite = asyncio.ensure_future(asyncio.to_thread(writeCheckpoint, checkpointFile, state.snapshot()))
+
+    try:
+        while True:
+            data = await reader.read(readSize)
+            if not data:
+                lines = [partial] if partial.strip() else []
+            else:
+                lines = (partial + data).split(b"\n")
+                partial = lines.pop()
+
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                median = state.add(int(line))
+                if onMedian is not None:
+                    onMedian(median)
+                if checkpointFile and state.count % checkpointEvery == 0:
+                    await checkpoint()
+
+            if not data:
+                break
+
+        if checkpointFile:
+            await checkpoint()
+            await pendingWrite
+    finally:
+        # a parse error or a cancellation must not leave a checkpoint write running behind the caller,
+        # a resume would load the file while an older snapshot is still being renamed over it
+        if pendingWrite is not None and not pendingWrite.done():
+            await asyncio.wait([pendingWrite])
+    return state
+
+
+async def ingestMediansFromFile(fileName, **kwargs):
+    # ingestMedians over a pipe from a file, mostly useful to compare with medianMaintenance
+    process = await asyncio.create_subprocess_exec("cat", fileName, stdout=asyncio.subprocess.PIPE)
+    state = await ingestMedians(process.stdout, **kwargs)
+    await process.wait()
+    return state
+
+
+def benchmarkSketch(numbers, compressions=(25, 100, 400), quantiles=(0.5, 0.9, 0.95, 0.99), checkEvery=1000):
+    # accuracy and speed of QuantileSketch against the exact heap path
+    # median error is checked every checkEvery numbers against prefixMedians, the other quantiles against the sorted stream at the end
+    numbers = list(numbers)
+    start = time.perf_counter()
+    exactMedians = list(prefixMedians(numbers))
+    exactTime = time.perf_counter() - start
+    ordered = sorted(numbers)
+    print("exact heaps: %.3fs for %i numbers" % (exactTime, len(numbers)))
+
+    results = []
+    for compression in compressions:
+        sketch = QuantileSketch(compression)
+        worstMedianError = 0
+        start = time.perf_counter()
+        for i, number in enumerate(numbers, 1):
+            sketch.add(number)
+            if i % checkEvery == 0:
+                # error measured in ranks, as a fraction of the numbers seen so far
+                seen = sorted(numbers[:i])
+                rank = bisect.bisect_left(seen, sketch.median())
+                exactRank = bisect.bisect_left(seen, exactMedians[i - 1])
+                worstMedianError = max(worstMedianError, abs(rank - exactRank) / i)
+        elapsed = time.perf_counter() - start
+
+        quantileErrors = {}
+        for q in quantiles:
+            rank = bisect.bisect_left(ordered, sketch.quantile(q))
+            quantileErrors[q] = abs(rank - q * len(ordered)) / len(ordered)
+        results.append({"compression": compression, "centroids": sketch.size(), "seconds": elapsed,
+                        "worstMedianError": worstMedianError, "quantileErrors": quantileErrors})
+        print("compression %i: %i centroids, %.3fs, worst median rank error %.4f, %s" % (
+            compression, sketch.size(), elapsed, worstMedianError,
+            ", ".join("p%g %.4f" % (q * 100, quantileErrors[q]) for q in quantiles)))
+    return results
+
+
+if __name__ == "__main__":
+    ans = medianMaintenance("median.txt")
+    print(ans)
 
     
     
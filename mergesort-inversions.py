@@ -6,6 +6,22 @@ Your task is to compute the number of inversions in the file given, where the it
 Because of the large size of this array, you should implement the fast divide-and-conquer algorithm covered in the video lectures.
 """
 
+import mmap
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    # without numpy the rank compression falls back to sorted() and a dict
+    np = None
+
 def buildArray(fileName):
     arr = []
 
@@ -73,7 +89,404 @@ def combine(left, right, arr):
 
     return inv_count
 
+def merge_sort_bottom_up(arr):
+    # iterative version of merge_sort that doesn't allocate anything while sorting, past the two buffers of sort_count
+    # returns the same inversion count as merge_sort, arr itself is left unchanged
+    return sort_count(arr)[0]
+
+def sort_count(arr):
+    # the numbers are copied once into an array('q') and merged back and forth with a second, preallocated buffer:
+    # each pass merges neighbouring runs of width elements from src into dst, then the two buffers swap roles
+    # returns the inversion count and the sorted array('q')
+    n = len(arr)
+    return sort_count_buffers(array("q", arr), array("q", bytes(8 * n)), n)
+
+def sort_count_buffers(src, dst, n):
+    # sort_count on buffers owned by the caller, so they can be reused from one call to the next
+    # sorts src[:n] using dst as the second buffer, returns the inversion count and whichever buffer ends up sorted
+    inv_count = 0
+
+    # first pass, runs of width 1 are merged with a single compare and swap
+    for lo in range(0, n - 1, 2):
+        left, right = src[lo], src[lo + 1]
+        if left > right:
+            inv_count += 1
+            dst[lo], dst[lo + 1] = right, left
+        else:
+            dst[lo], dst[lo + 1] = left, right
+    if n % 2:
+        dst[n - 1] = src[n - 1]
+    src, dst = dst, src
+
+    width = 2
+    while width < n:
+        inv_count += merge_runs(src, dst, 0, n, width)
+        src, dst = dst, src
+        width *= 2
+
+    return inv_count, src
+
+def merge_runs(src, dst, lo, hi, width):
+    # one pass of the bottom up merge sort over src[lo:hi]: merges every pair of neighbouring sorted runs
+    # of width elements into dst, counting the inversions between them the same way as combine
+    # the merge of combine is inlined here with the bounds kept in locals, so there's no len() or function call per merge
+    # src and dst can be array('q') or memoryviews of shared memory
+    # the block copies go through memoryviews, slicing an array would allocate a temporary array for every copy
+    with memoryview(src) as src_view, memoryview(dst) as dst_view:
+        return _merge_runs(src, dst, src_view, dst_view, lo, hi, width)
+
+def _merge_runs(src, dst, src_view, dst_view, lo, hi, width):
+    inv_count = 0
+    for lo in range(lo, hi, 2 * width):
+        mid = lo + width
+        if mid >= hi:
+            # no right half, the last run is only copied over
+            dst_view[lo:hi] = src_view[lo:hi]
+            continue
+        end = min(mid + width, hi)
+        i, j, k = lo, mid, lo
+
+        # skip the merge loop if the two halves are already in order
+        if src[mid - 1] > src[mid]:
+            # the current element of each half is kept in a local and only reloaded from the side that moved
+            left, right = src[i], src[j]
+            while True:
+                if left <= right:
+                    dst[k] = left
+                    k += 1
+                    i += 1
+                    if i == mid:
+                        break
+                    left = src[i]
+                else:
+                    # every element still waiting in the left half is greater than right
+                    inv_count += mid - i
+                    dst[k] = right
+                    k += 1
+                    j += 1
+                    if j == end:
+                        break
+                    right = src[j]
+
+        # copy whichever half is left over with a slice assignment
+        dst_view[k:k + mid - i] = src_view[i:mid]
+        k += mid - i
+        dst_view[k:k + end - j] = src_view[j:end]
+
+    return inv_count
+
+def count_inversions_parallel(arr, workers=None, chunk_count=None):
+    # inversion count over a process pool for arrays too big for one core
+    # the numbers live in two int64 buffers in shared memory, the workers attach to them by name instead of receiving pickled lists
+    # 1. every chunk is sorted by a worker with sort_count, which also counts the inversions inside the chunk
+    # 2. the sorted chunks are merged pairwise in a tree, each merge of a level runs on its own worker with merge_runs
+    #    and counts the inversions across the two chunks, the buffers swap roles after every level like in sort_count
+    n = len(arr)
+    workers = workers or multiprocessing.cpu_count()
+    chunk_count = max(1, min(chunk_count or workers, n))
+    if n < 2:
+        return 0
+    chunk_size = -(-n // chunk_count)
+
+    shm = shared_memory.SharedMemory(create=True, size=2 * 8 * n)
+    try:
+        view = shm.buf.cast("q")
+        view[:n] = array("q", arr)
+        view.release()
+
+        with multiprocessing.Pool(workers) as pool:
+            tasks = [(shm.name, n, lo, min(lo + chunk_size, n)) for lo in range(0, n, chunk_size)]
+            inv_count = sum(pool.map(_sort_chunk, tasks))
+
+            # buffer 0 holds the sorted chunks, each level merges from one buffer into the other
+            source = 0
+            width = chunk_size
+            while width < n:
+                tasks = [(shm.name, n, source, lo, min(lo + 2 * width, n), width) for lo in range(0, n, 2 * width)]
+                inv_count += sum(pool.map(_merge_chunks, tasks))
+                source = 1 - source
+                width *= 2
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return inv_count
+
+def _sort_chunk(task):
+    # worker: sort view[lo:hi] of buffer 0 in place and return the inversions inside it
+    name, n, lo, hi = task
+    shm = shared_memory.SharedMemory(name=name)
+    view = shm.buf.cast("q")
+    try:
+        inv_count, ordered = sort_count(view[lo:hi])
+        view[lo:hi] = ordered
+    finally:
+        view.release()
+        shm.close()
+    return inv_count
+
+def _merge_chunks(task):
+    # worker: merge the two sorted runs of [lo, hi) from buffer source into the other buffer
+    name, n, source, lo, hi, width = task
+    shm = shared_memory.SharedMemory(name=name)
+    view = shm.buf.cast("q")
+    buffers = [view[:n], view[n:2 * n]]
+    try:
+        inv_count = merge_runs(buffers[source], buffers[1 - source], lo, hi, width)
+    finally:
+        for buffer in buffers:
+            buffer.release()
+        view.release()
+        shm.close()
+    return inv_count
+
+class KendallTau:
+    # kendall tau distance between two rankings of the same items: the number of pairs of items they order differently
+    # that's the inversion count of ranking a once every item is replaced by its position in ranking b,
+    # counted with sort_count_buffers on two int64 buffers that are kept and only grown between calls
+    def __init__(self):
+        self.src = array("q")
+        self.dst = array("q")
+
+    def distance(self, a, b):
+        n = len(a)
+        if len(b) != n:
+            raise ValueError("rankings have different lengths: %i and %i" % (n, len(b)))
+        position = {item: i for i, item in enumerate(b)}
+        if len(position) != n:
+            raise ValueError("ranking b has repeated items")
+
+        if len(self.src) < n:
+            self.src = array("q", bytes(8 * n))
+            self.dst = array("q", bytes(8 * n))
+        src = self.src
+        # a has to be a permutation of b, so every position of b must be used exactly once
+        used = bytearray(n)
+        try:
+            for i, item in enumerate(a):
+                j = position[item]
+                if used[j]:
+                    raise ValueError("ranking a has repeated item %r" % (item,))
+                used[j] = 1
+                src[i] = j
+        except KeyError as e:
+            raise ValueError("item %r of ranking a is not in ranking b" % e.args[0])
+
+        return sort_count_buffers(src, self.dst, n)[0]
+
+def kendall_tau(a, b):
+    return KendallTau().distance(a, b)
+
+# KendallTau of the current worker process, set up by the pool initializer so its buffers are reused for every pair
+_worker_kendall_tau = None
+
+def _init_kendall_worker():
+    global _worker_kendall_tau
+    _worker_kendall_tau = KendallTau()
+
+def _kendall_pair(pair):
+    return _worker_kendall_tau.distance(*pair)
+
+def kendall_tau_batch(pairs, workers=None, chunksize=64):
+    # kendall tau distance for every (a, b) pair, in order
+    # with workers, the pairs are spread over a process pool where every worker keeps its own buffers
+    if workers is None or workers <= 1:
+        counter = KendallTau()
+        return [counter.distance(a, b) for a, b in pairs]
+    with multiprocessing.Pool(workers, initializer=_init_kendall_worker) as pool:
+        return pool.map(_kendall_pair, pairs, chunksize)
+
+def convert_to_binary(fileName, binaryFileName, block=1 << 16):
+    # one time conversion of a text file like the one read by buildArray into raw little endian int64s
+    # so the numbers can later be mapped straight into memory instead of parsed line by line
+    with open(fileName, "r") as f, open(binaryFileName, "wb") as out:
+        buffer = array("q")
+        for row in f:
+            row = row.strip()
+            if row:
+                buffer.append(int(row))
+                if len(buffer) == block:
+                    _write_int64(out, buffer)
+                    buffer = array("q")
+        _write_int64(out, buffer)
+
+def _write_int64(f, values):
+    if sys.byteorder != "little":
+        values.byteswap()
+    values.tofile(f)
+
+def load_binary(binaryFileName):
+    # map a file written by convert_to_binary into memory, pages are only read from disk when they're used
+    # a read only numpy.memmap when numpy is available, otherwise an int64 memoryview over an mmap
+    if np is not None:
+        if os.path.getsize(binaryFileName) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.memmap(binaryFileName, dtype="<i8", mode="r")
+    with open(binaryFileName, "rb") as f:
+        if os.path.getsize(binaryFileName) == 0:
+            return array("q")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("q")
+
+def count_inversions_external(binaryFileName, memory_budget=256 * 2**20, temp_dir=None):
+    # merge sort inversion count for a binary int64 file that doesn't fit in memory
+    # 1. runs of memory_budget // 16 numbers (two int64 buffers) are sorted in memory with sort_count_buffers,
+    #    which counts the inversions inside each run, and spilled to a temporary file
+    # 2. neighbouring runs are merged pairwise from one temporary file into the other, reading and writing in blocks,
+    #    and the inversions across each pair are counted like in combine: a number from the right run jumps over
+    #    everything that's still waiting in the left run
+    n = os.path.getsize(binaryFileName) // 8
+    run_size = max(2, memory_budget // 16)
+    # two input blocks and one output block during the merges
+    block = max(1, memory_budget // 24)
+    inv_count = 0
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as spill_dir:
+        names = [os.path.join(spill_dir, "runs0.bin"), os.path.join(spill_dir, "runs1.bin")]
+
+        with open(binaryFileName, "rb") as f, open(names[0], "wb") as out:
+            for _ in range(0, n, run_size):
+                run = _read_int64(f, run_size)
+                # sort the run in the array it was read into, so only one more buffer is allocated
+                run_inversions, ordered = sort_count_buffers(run, array("q", bytes(8 * len(run))), len(run))
+                inv_count += run_inversions
+                _write_int64(out, ordered)
+
+        source = 0
+        width = run_size
+        while width < n:
+            with open(names[source], "rb") as left, open(names[source], "rb") as right, open(names[1 - source], "wb") as out:
+                for lo in range(0, n, 2 * width):
+                    mid = min(lo + width, n)
+                    hi = min(lo + 2 * width, n)
+                    inv_count += _merge_files(left, right, out, lo, mid, hi, block)
+            source = 1 - source
+            width *= 2
+
+    return inv_count
+
+def _read_int64(f, count):
+    values = array("q")
+    values.frombytes(f.read(8 * count))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+def _iter_int64(f, start, end, block):
+    # stream the numbers at positions start..end of an int64 file, block numbers at a time
+    f.seek(8 * start)
+    while start < end:
+        values = _read_int64(f, min(block, end - start))
+        start += len(values)
+        yield from values
+
+def _merge_files(left_file, right_file, out, lo, mid, hi, block):
+    # merge the sorted runs [lo, mid) and [mid, hi) of the spill file and append them to out, returns the cross inversions
+    inv_count = 0
+    left_remaining = mid - lo
+    left_values = _iter_int64(left_file, lo, mid, block)
+    right_values = _iter_int64(right_file, mid, hi, block)
+    buffer = array("q")
+    left = next(left_values, None)
+    right = next(right_values, None)
+
+    while left is not None and right is not None:
+        if left <= right:
+            buffer.append(left)
+            left_remaining -= 1
+            left = next(left_values, None)
+        else:
+            inv_count += left_remaining
+            buffer.append(right)
+            right = next(right_values, None)
+        if len(buffer) >= block:
+            _write_int64(out, buffer)
+            buffer = array("q")
+
+    # one of the runs is finished, the other one is copied over as it is
+    for value, rest in ((left, left_values), (right, right_values)):
+        if value is not None:
+            buffer.append(value)
+            for value in rest:
+                buffer.append(value)
+                if len(buffer) >= block:
+                    _write_int64(out, buffer)
+                    buffer = array("q")
+    _write_int64(out, buffer)
+    return inv_count
+
+def compress_ranks(arr):
+    # coordinate compression: replace every value by its rank among the distinct values, starting at 1
+    # equal values get the same rank so duplicates are handled
+    if np is not None:
+        # numpy picks the dtype from the values, ints past int64 end up as object and go the sorted() way below,
+        # and so do ints mixed with floats that float64 can't hold exactly (two distinct ints would share a rank)
+        values = np.asarray(arr)
+        exact = values.dtype.kind in "biuU" or values.dtype.kind == "f" and not any(
+            isinstance(value, int) and abs(value) > 2 ** 53 for value in arr)
+        if values.ndim == 1 and exact:
+            # np.unique sorts once in C and return_inverse gives each element's position among the distinct values
+            _, ranks = np.unique(values, return_inverse=True)
+            return (ranks + 1).tolist(), int(ranks.max()) + 1 if len(ranks) else 0
+    distinct = sorted(set(arr))
+    rank_of = {value: rank for rank, value in enumerate(distinct, 1)}
+    return [rank_of[value] for value in arr], len(distinct)
+
+def count_inversions_fenwick(arr):
+    # inversion count with a binary indexed tree over the compressed ranks, a drop in alternative to merge_sort
+    # walking left to right, the inversions ending at an element are the elements already seen that are strictly greater:
+    # seen - (number of seen elements with rank <= this rank), read off the tree as a prefix sum
+    # like merge_sort, equal values don't count as an inversion
+    ranks, size = compress_ranks(arr)
+    tree = [0] * (size + 1)
+    inv_count = 0
+
+    for seen, rank in enumerate(ranks):
+        # prefix sum of the counts of ranks 1..rank
+        i = rank
+        not_greater = 0
+        while i:
+            not_greater += tree[i]
+            i &= i - 1
+        inv_count += seen - not_greater
+
+        # count this rank
+        i = rank
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+
+    return inv_count
+
+def benchmark(n=10**7, repeat=1, duplicates=False):
+    # compare merge_sort with the other inversion counters on n random numbers
+    # a permutation of 1..n by default, or numbers drawn from 1..n/10 to have lots of duplicates
+    if duplicates:
+        arr = [random.randint(1, max(1, n // 10)) for _ in range(n)]
+    else:
+        arr = list(range(1, n + 1))
+        random.shuffle(arr)
+
+    engines = [
+        ("merge_sort", lambda: merge_sort(list(arr))),
+        ("merge_sort_bottom_up", lambda: merge_sort_bottom_up(arr)),
+        ("count_inversions_fenwick", lambda: count_inversions_fenwick(arr)),
+    ]
+    times = {}
+    expected = None
+    for name, engine in engines:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            inv_count = engine()
+        times[name] = (time.perf_counter() - start) / repeat
+
+        if expected is None:
+            expected = inv_count
+        elif inv_count != expected:
+            raise AssertionError("%s counted %i inversions, merge_sort counted %i" % (name, inv_count, expected))
+        print("n = %i: %s %.2fs (%.2fx)" % (n, name, times[name], times["merge_sort"] / times[name]))
+    return times
 
-arr = buildArray("IntegerArray.txt")
-ans = merge_sort(arr)
-print(ans)
+if __name__ == "__main__":
+    arr = buildArray("IntegerArray.txt")
+    ans = merge_sort(arr)
+    print(ans)
@@ -1,6 +1,48 @@
+import heapq
+import multiprocessing
+import os
+import random
+import tempfile
+from fractions import Fraction
+
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is only needed for the array backed mode
+    np = None
+
+# largest value that fits in a numpy int64
+INT64_MAX = 2 ** 63 - 1
+
+def differenceKey(job):
+    return (job[0]-job[1], job[0])
+
+def ratioKey(job):
+    return job[0]/job[1]
+
 class WeightedSum:
-    def __init__(self, fileName):
+    def __init__(self, fileName, arrayBacked=False):
         self.arr = []
+        self.arrayBacked = arrayBacked
+
+        if arrayBacked:
+            # keep the jobs in two numpy arrays instead of a list of [weight, length] lists
+            # for job files with tens of millions of rows this is a fraction of the memory
+            if np is None:
+                raise ImportError("the array backed mode of WeightedSum requires numpy")
+            with open(fileName, "r") as f:
+                f.readline()
+                values = np.fromfile(f, dtype=np.int64, sep=" ")
+            self.weights = values[0::2].copy()
+            self.lengths = values[1::2].copy()
+            return
+
         f = open(fileName, "r")
         firstline = True
 
@@ -16,18 +58,20 @@ class WeightedSum:
         # creating a new array with the sorted order
         # sorted first by the difference w-l
         # use the weight as the tie breaker
-        return sorted(self.arr, key = lambda job: (job[0]-job[1], job[0]), reverse=True)
+        return sorted(self.arr, key=differenceKey, reverse=True)
 
     def orderByRatio(self):
         # sort by the ratio w/l
         # ties don't matter
-        return sorted(self.arr, key= lambda job: job[0]/job[1], reverse=True)
+        return sorted(self.arr, key=ratioKey, reverse=True)
+
+    def minWeightedSum(self, order="ratio"):
+        if self.arrayBacked:
+            return self.minWeightedSumArray(order)
 
-    def minWeightedSum(self):
         completionTime = 0
         totalSum = 0
-        #orderedArr = self.orderByDifference()
-        orderedArr = self.orderByRatio()
+        orderedArr = self.orderByDifference() if order == "difference" else self.orderByRatio()
 
         for job in orderedArr:
             # add the length to the completion time
@@ -37,8 +81,308 @@ class WeightedSum:
 
         return totalSum
 
+    def orderArray(self, order="ratio"):
+        return orderJobs(self.weights, self.lengths, order)
+
+    def minWeightedSumArray(self, order="ratio"):
+        ordering = self.orderArray(order)
+        weights = self.weights[ordering]
+        lengths = self.lengths[ordering]
+        return weightedCompletionSum(weights, lengths)
+
+    def evaluateWeightScenarios(self, weightMatrix, order="ratio", workers=None):
+        # optimal weighted sum for every row of weightMatrix, each row is an alternative set of weights for the same jobs
+        # the parsed lengths are reused and a scenario whose order is the same as the previous one skips the sort
+        # with workers set, the scenarios are split into chunks and evaluated on a process pool
+        if self.arrayBacked:
+            lengths = self.lengths
+        else:
+            if np is None:
+                raise ImportError("evaluateWeightScenarios requires numpy")
+            lengths = np.array([job[1] for job in self.arr], dtype=np.int64)
+        weightMatrix = np.asarray(weightMatrix, dtype=np.int64)
+        if weightMatrix.ndim != 2 or weightMatrix.shape[1] != len(lengths):
+            raise ValueError("weightMatrix must have one column per job, expected %i columns" % len(lengths))
+
+        if not workers or workers == 1 or len(weightMatrix) < 2:
+            return _evaluateScenarios((weightMatrix, lengths, order))
+
+        chunks = np.array_split(weightMatrix, min(workers, len(weightMatrix)))
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_evaluateScenarios, [(chunk, lengths, order) for chunk in chunks])
+        return [total for chunkResults in results for total in chunkResults]
+
+def orderJobs(weights, lengths, order="ratio"):
+    # vectorized version of orderByRatio and orderByDifference, returns the job indices in schedule order
+    # both sorts are stable on the negated keys, which gives the same order as sorted(..., reverse=True)
+    if order == "difference":
+        # lexsort sorts by the last key first, so this is by w-l and then by w
+        return np.lexsort((-weights, -(weights - lengths)))
+    return np.argsort(-(weights / lengths), kind="stable")
+
+def _isOrdering(ordering, weights, lengths, order):
+    # check whether ordering is exactly what orderJobs would return for these weights,
+    # ie. the keys never increase and equal keys keep their original relative order
+    indexIncreasing = ordering[:-1] < ordering[1:]
+    if order == "difference":
+        differences = (weights - lengths)[ordering]
+        orderedWeights = weights[ordering]
+        sameDifference = differences[:-1] == differences[1:]
+        decreasing = (differences[:-1] > differences[1:]) | (sameDifference & (orderedWeights[:-1] > orderedWeights[1:]))
+        tied = sameDifference & (orderedWeights[:-1] == orderedWeights[1:])
+    else:
+        ratios = (weights / lengths)[ordering]
+        decreasing = ratios[:-1] > ratios[1:]
+        tied = ratios[:-1] == ratios[1:]
+    return bool(np.all(decreasing | (tied & indexIncreasing)))
+
+def _evaluateScenarios(args):
+    # worker for evaluateWeightScenarios, module level so it can be sent to a process pool
+    weightMatrix, lengths, order = args
+    results = []
+    ordering = None
+    for weights in weightMatrix:
+        if ordering is None or not _isOrdering(ordering, weights, lengths, order):
+            ordering = orderJobs(weights, lengths, order)
+            completionLengths = lengths[ordering]
+        results.append(weightedCompletionSum(weights[ordering], completionLengths))
+    return results
+
+class IncrementalWeightedSum:
+    # online version of minWeightedSum for a job set that keeps changing
+    # the jobs are kept in orderByRatio order in a treap with the subtree sums of the lengths and weights,
+    # so adding or removing a job updates the optimal weighted sum in O(log n) expected time:
+    # a job inserted at some position completes after all the lengths before it and delays all the weights after it
+    # jobs with the same ratio can be run in any order without changing the sum, so they share one node
+    def __init__(self, jobs=()):
+        self.root = None
+        self.totalSum = 0
+        self.jobCounts = {}
+        for weight, length in jobs:
+            self.addJob(weight, length)
+
+    def minWeightedSum(self):
+        return self.totalSum
+
+    def __len__(self):
+        return sum(self.jobCounts.values())
+
+    def addJob(self, weight, length):
+        key = Fraction(weight, length)
+        node, lengthBefore, weightAfter = self._find(key)
+        # the new job goes at the end of the jobs with the same ratio
+        if node is not None:
+            lengthBefore += node.length
+        self.totalSum += weight * (lengthBefore + length) + length * weightAfter
+
+        if node is None:
+            left, right = _split(self.root, key)
+            self.root = _merge(_merge(left, _TreapNode(key, weight, length)), right)
+        else:
+            self._addToBucket(key, weight, length)
+        self.jobCounts[(weight, length)] = self.jobCounts.get((weight, length), 0) + 1
+
+    def removeJob(self, weight, length):
+        if not self.jobCounts.get((weight, length)):
+            raise ValueError("job (%i, %i) is not scheduled" % (weight, length))
+
+        key = Fraction(weight, length)
+        node, lengthBefore, weightAfter = self._find(key)
+        # remove it as if it was the last job with that ratio, which gives the same sum as anywhere else in the tie
+        lengthBefore += node.length - length
+        self.totalSum -= weight * (lengthBefore + length) + length * weightAfter
+
+        self.jobCounts[(weight, length)] -= 1
+        if not self.jobCounts[(weight, length)]:
+            del self.jobCounts[(weight, length)]
+
+        if node.length == length:
+            # last job with this ratio, take the node out of the treap
+            left, rest = _split(self.root, key)
+            _, right = _split(rest, key, inclusive=True)
+            self.root = _merge(left, right)
+        else:
+            self._addToBucket(key, -weight, -length)
+
+    def _find(self, key):
+        # walk down to key and return its node (or None)
+        # along with the total length of the jobs scheduled before it (higher ratio) and the total weight after it
+        lengthBefore = weightAfter = 0
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                lengthBefore += node.length + _totalLength(node.right)
+                node = node.left
+            elif key > node.key:
+                weightAfter += node.weight + _totalWeight(node.left)
+                node = node.right
+            else:
+                lengthBefore += _totalLength(node.right)
+                weightAfter += _totalWeight(node.left)
+                break
+        return node, lengthBefore, weightAfter
+
+    def _addToBucket(self, key, weight, length):
+        # every node on the path to key has it in its subtree, so their totals change too
+        node = self.root
+        while node is not None:
+            node.totalWeight += weight
+            node.totalLength += length
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                node.weight += weight
+                node.length += length
+                break
+
+class _TreapNode:
+    __slots__ = ("key", "priority", "left", "right", "weight", "length", "totalWeight", "totalLength")
+
+    def __init__(self, key, weight, length):
+        self.key = key
+        self.priority = random.random()
+        self.left = self.right = None
+        # weight and length of the jobs with this ratio, and the totals for the whole subtree
+        self.weight = self.totalWeight = weight
+        self.length = self.totalLength = length
+
+def _totalWeight(node):
+    return node.totalWeight if node is not None else 0
+
+def _totalLength(node):
+    return node.totalLength if node is not None else 0
+
+def _update(node):
+    node.totalWeight = node.weight + _totalWeight(node.left) + _totalWeight(node.right)
+    node.totalLength = node.length + _totalLength(node.left) + _totalLength(node.right)
+    return node
+
+def _split(node, key, inclusive=False):
+    # split the treap into keys < key and keys >= key, or keys <= key and keys > key when inclusive
+    if node is None:
+        return None, None
+    if node.key < key or (inclusive and node.key == key):
+        node.right, right = _split(node.right, key, inclusive)
+        return _update(node), right
+    left, node.left = _split(node.left, key, inclusive)
+    return left, _update(node)
+
+def _merge(left, right):
+    # every key in left is smaller than every key in right
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+def externalMinWeightedSum(fileName, order="ratio", memoryBudget=64 * 2**20, jobBytes=200, bufferBytes=2**16, tempDir=None,
+                           maxOpenRuns=None):
+    # out of core version of WeightedSum.minWeightedSum for job files that don't fit in memory
+    # memoryBudget bounds the peak memory: the jobs are sorted in runs of about memoryBudget // jobBytes jobs,
+    # each run is written to disk, and the runs are k-way merged with at most memoryBudget // bufferBytes open at once
+    # the merge fan in is also capped by maxOpenRuns, by default the open file limit of the process minus some room
+    # for the output file and whatever else is open, otherwise a big merge fails with "Too many open files"
+    # the weighted completion sum is computed in one streaming pass over the final merge
+    key = differenceKey if order == "difference" else ratioKey
+    runSize = max(1, memoryBudget // jobBytes)
+    if maxOpenRuns is None:
+        maxOpenRuns = openFileLimit() - OPEN_FILE_MARGIN
+    fanIn = max(2, min(memoryBudget // bufferBytes, maxOpenRuns))
+
+    with tempfile.TemporaryDirectory(dir=tempDir) as runDir:
+        runs = []
+        f = open(fileName, "r")
+        f.readline()
+        run = []
+        for line in f:
+            weight, length = line.split()
+            run.append((int(weight), int(length)))
+            if len(run) == runSize:
+                runs.append(_writeRun(sorted(run, key=key, reverse=True), runDir, "0_%i" % len(runs)))
+                run = []
+        if run:
+            runs.append(_writeRun(sorted(run, key=key, reverse=True), runDir, "0_%i" % len(runs)))
+            run = []
+        f.close()
+
+        # merge passes until the remaining runs can be merged together in one go
+        # groups of neighbouring runs are merged in order so the merge stays stable, like sorted()
+        mergePass = 0
+        while len(runs) > fanIn:
+            mergePass += 1
+            merged = []
+            for start in range(0, len(runs), fanIn):
+                group = [_readRun(name, bufferBytes) for name in runs[start:start + fanIn]]
+                merged.append(_writeRun(heapq.merge(*group, key=key, reverse=True), runDir, "%i_%i" % (mergePass, len(merged))))
+                for name in runs[start:start + fanIn]:
+                    os.remove(name)
+            runs = merged
+
+        completionTime = 0
+        totalSum = 0
+        for weight, length in heapq.merge(*[_readRun(name, bufferBytes) for name in runs], key=key, reverse=True):
+            completionTime += length
+            totalSum += completionTime * weight
+        return totalSum
+
+# file descriptors left for the output run, stdin/stdout/stderr and anything else the caller has open
+OPEN_FILE_MARGIN = 64
+
+def openFileLimit():
+    # soft limit on open files for this process, a conservative guess where the resource module doesn't exist
+    if resource is None:
+        return 512
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return soft if soft != resource.RLIM_INFINITY else 2**16
+
+def _writeRun(jobs, runDir, runId):
+    name = os.path.join(runDir, "run%s.txt" % runId)
+    with open(name, "w") as f:
+        for weight, length in jobs:
+            f.write("%i %i\n" % (weight, length))
+    return name
+
+def _readRun(name, bufferBytes):
+    with open(name, "r", buffering=bufferBytes) as f:
+        for line in f:
+            weight, length = line.split()
+            yield int(weight), int(length)
+
+def weightedCompletionSum(weights, lengths):
+    # sum of completion time * weight for jobs already in schedule order, done in bulk with numpy
+    # the answer is returned as a python int so it can't overflow, the int64 pieces are kept within range:
+    # the completion times are at most n * maxLength, so every product is at most maxWeight * n * maxLength
+    # and the products are summed in chunks small enough that a chunk sum can't exceed INT64_MAX
+    if len(weights) == 0:
+        return 0
+
+    totalLength = int(lengths.max()) * len(lengths)
+    maxWeight = int(np.abs(weights).max())
+    if totalLength > INT64_MAX:
+        # the completion times themselves don't fit, fall back to exact python ints
+        completionTimes = np.cumsum(lengths.astype(object))
+        return int(np.dot(completionTimes, weights.astype(object)))
+
+    completionTimes = np.cumsum(lengths)
+    productBound = maxWeight * totalLength
+    if productBound > INT64_MAX:
+        return int(np.dot(completionTimes.astype(object), weights.astype(object)))
+
+    chunkSize = INT64_MAX // max(productBound, 1)
+    totalSum = 0
+    for start in range(0, len(weights), chunkSize):
+        totalSum += int(np.dot(completionTimes[start:start + chunkSize], weights[start:start + chunkSize]))
+    return totalSum
+
    
     
-ws = WeightedSum("jobs.txt")
-ans = ws.minWeightedSum()
-print(ans)
+if __name__ == "__main__":
+    ws = WeightedSum("jobs.txt")
+    ans = ws.minWeightedSum()
+    print(ans)